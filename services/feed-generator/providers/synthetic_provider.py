@@ -19,6 +19,7 @@ import time
 import json
 import redis
 import logging
+import math
 import random
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
@@ -167,8 +168,6 @@ class SyntheticFeedProvider:
         Returns:
             Dictionary with option price and Greeks
         """
-        import math
-        
         # Risk-free rate (simplified)
         r = 0.05
         
@@ -9,9 +9,13 @@ Handles:
 - Trade generation
 """
 
+import itertools
 import uuid
-from datetime import datetime
+from functools import lru_cache
+from datetime import date, datetime
 from typing import Dict, List, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
 import structlog
 
 from order_book import OrderBookManager
@@ -19,6 +23,38 @@ from rms import RiskManagementSystem
 
 logger = structlog.get_logger()
 
+# Order/trade ID generation: per-process tag + monotonic counters
+_PROCESS_TAG = uuid.uuid4().hex[:6].upper()  # Keeps IDs unique across restarts/replicas
+_ORDER_COUNTER = itertools.count()
+_TRADE_COUNTER = itertools.count()
+_DATE_CACHE = {'day': None, 'str': None}
+
+
+def _today_str() -> str:
+    """Get today's date as YYYYMMDD, reformatted only on day rollover"""
+    today = date.today()
+    if today != _DATE_CACHE['day']:
+        _DATE_CACHE['str'] = today.strftime('%Y%m%d')
+        _DATE_CACHE['day'] = today
+    return _DATE_CACHE['str']
+
+
+# Last traded price cache TTL (seconds); misses fall back to the last trade
+_PRICE_TTL = 3600
+
+
+# Per-symbol Redis keys and bound loggers, cached for the most recently traded symbols
+@lru_cache(maxsize=4096)
+def _price_key(symbol: str) -> str:
+    """Get Redis price key for symbol"""
+    return f"price:{symbol}"
+
+
+@lru_cache(maxsize=4096)
+def _symbol_logger(symbol: str) -> structlog.BoundLogger:
+    """Get logger bound to symbol"""
+    return logger.bind(symbol=symbol)
+
 
 class OrderManagementSystem:
     """Order lifecycle management"""
@@ -28,12 +64,26 @@ class OrderManagementSystem:
         self.redis = redis_client
         self.order_book_manager = order_book_manager
         self.rms = rms
+        self._ensure_indexes()
         logger.info("oms_initialized")
     
+    def _ensure_indexes(self):
+        """Create indexes on the trades/positions collections this class writes
+        
+        user_trades_idx backs the per-user trade reads in RMS and PortfolioManager.
+        """
+        try:
+            self.db.trades.create_index([('user_id', ASCENDING), ('executed_at', DESCENDING)],
+                                        name='user_trades_idx')
+            self.db.trades.create_index([('symbol', ASCENDING), ('executed_at', DESCENDING)])
+            self.db.positions.create_index([('user_id', ASCENDING), ('symbol', ASCENDING)])
+        except PyMongoError as e:
+            logger.warning("index_creation_failed", error=str(e))
+    
     def place_order(self, user_id: str, order_request: Dict) -> Dict:
         """Place new order with risk checks"""
         # Generate order ID
-        order_id = f"ORD_{datetime.now().strftime('%Y%m%d')}_{uuid.uuid4().hex[:8].upper()}"
+        order_id = f"ORD_{_today_str()}_{_PROCESS_TAG}{next(_ORDER_COUNTER):08X}"
         
         # Get current market price
         symbol = order_request['symbol']
@@ -62,10 +112,12 @@ class OrderManagementSystem:
         
         try:
             # Pre-trade risk check
-            self.rms.pre_trade_risk_check(user_id, order, current_price)
+            self.rms.pre_trade_risk_check(user_id, order, current_price, now=order['placed_at'])
             
             # Attempt execution
             order = self._execute_order(order, current_price)
+            if order['filled_quantity']:
+                self.rms.invalidate_context(user_id)
             
             # Save order to database
             self.db.orders.insert_one(order)
@@ -122,6 +174,9 @@ class OrderManagementSystem:
             # Generate trades for each fill
             self._generate_trades(order, fills)
             
+            # Cache last traded price as a bare float string
+            self.redis.setex(_price_key(symbol), _PRICE_TTL, str(order_book.last_trade_price))
+            
             # Update user position
             self._update_position(order)
             
@@ -161,15 +216,21 @@ class OrderManagementSystem:
         return fills or []
     
     def _generate_trades(self, order: Dict, fills: List[Tuple[float, int]]):
-        """Generate trade records for fills"""
+        """Generate trade records for fills (single batched insert)"""
+        if not fills:
+            return
+        
+        now = datetime.now()
+        trades = []
+        
         for fill_price, fill_qty in fills:
-            trade_id = f"TRD_{datetime.now().strftime('%Y%m%d')}_{uuid.uuid4().hex[:8].upper()}"
+            trade_id = f"TRD_{_today_str()}_{_PROCESS_TAG}{next(_TRADE_COUNTER):08X}"
             
             value = fill_qty * fill_price
             commission = self._calculate_commission(value)
             net_value = value + commission if order['side'] == 'BUY' else value - commission
             
-            trade = {
+            trades.append({
                 'trade_id': trade_id,
                 'order_id': order['order_id'],
                 'user_id': order['user_id'],
@@ -180,26 +241,28 @@ class OrderManagementSystem:
                 'value': value,
                 'commission': commission,
                 'net_value': net_value,
-                'executed_at': datetime.now()
-            }
-            
-            self.db.trades.insert_one(trade)
-            
-            logger.info("trade_generated",
-                       trade_id=trade_id,
-                       qty=fill_qty,
-                       price=fill_price)
+                'executed_at': now
+            })
+        
+        self.db.trades.insert_many(trades)
+        
+        logger.info("trade_generated",
+                   order_id=order['order_id'],
+                   trade_ids=[t['trade_id'] for t in trades],
+                   num_trades=len(trades))
     
     def _update_position(self, order: Dict):
         """Update user position after order fill"""
+        filled_qty = order['filled_quantity']
+        if filled_qty == 0:
+            return  # Nothing filled - position unchanged
+        
+        avg_price = order['avg_fill_price']
         position = self.db.positions.find_one({
             'user_id': order['user_id'],
             'symbol': order['symbol']
         })
         
-        filled_qty = order['filled_quantity']
-        avg_price = order['avg_fill_price']
-        
         if position:
             # Existing position - update
             current_qty = position['quantity']
@@ -217,7 +280,7 @@ class OrderManagementSystem:
             if new_qty == 0:
                 # Position closed - delete
                 self.db.positions.delete_one({'_id': position['_id']})
-                logger.info("position_closed", symbol=order['symbol'])
+                _symbol_logger(order['symbol']).info("position_closed")
             else:
                 # Update position
                 self.db.positions.update_one(
@@ -228,7 +291,7 @@ class OrderManagementSystem:
                         'updated_at': datetime.now()
                     }}
                 )
-                logger.info("position_updated", symbol=order['symbol'], qty=new_qty)
+                _symbol_logger(order['symbol']).info("position_updated", qty=new_qty)
         
         else:
             # New position - create
@@ -255,26 +318,14 @@ class OrderManagementSystem:
             }
             
             self.db.positions.insert_one(new_position)
-            logger.info("position_opened", symbol=order['symbol'], qty=qty)
+            _symbol_logger(order['symbol']).info("position_opened", qty=qty)
     
     def _update_portfolio(self, order: Dict):
-        """Update portfolio after order fill"""
-        portfolio = self.db.portfolios.find_one({'user_id': order['user_id']})
-        
-        if not portfolio:
-            # Create initial portfolio
-            portfolio = {
-                'user_id': order['user_id'],
-                'cash_balance': 1000000.0,  # Initial 10 lakh
-                'margin_used': 0.0,
-                'margin_available': 1000000.0,
-                'total_pnl': 0.0,
-                'realized_pnl': 0.0,
-                'unrealized_pnl': 0.0,
-                'created_at': datetime.now()
-            }
-            self.db.portfolios.insert_one(portfolio)
+        """Update portfolio after order fill
         
+        Single upserting pipeline update: creates the initial portfolio
+        if missing and applies the fill's cash/margin impact atomically.
+        """
         # Calculate impact
         filled_qty = order['filled_quantity']
         avg_price = order['avg_fill_price']
@@ -288,24 +339,35 @@ class OrderManagementSystem:
             cash_change = value - commission
             margin_change = self.rms.calculate_margin(order, avg_price)
         
-        # Update portfolio
-        new_cash = portfolio['cash_balance'] + cash_change
-        new_margin_used = portfolio['margin_used'] + margin_change
-        new_margin_available = new_cash - new_margin_used
+        if abs(cash_change) < 1e-9 and abs(margin_change) < 1e-9:
+            return  # No portfolio impact - skip the write
         
-        self.db.portfolios.update_one(
+        now = datetime.now()
+        portfolio = self.db.portfolios.find_one_and_update(
             {'user_id': order['user_id']},
-            {'$set': {
-                'cash_balance': new_cash,
-                'margin_used': new_margin_used,
-                'margin_available': new_margin_available,
-                'updated_at': datetime.now()
-            }}
+            [
+                {'$set': {
+                    # Initial 10 lakh for new portfolios
+                    'cash_balance': {'$add': [{'$ifNull': ['$cash_balance', 1000000.0]}, cash_change]},
+                    'margin_used': {'$add': [{'$ifNull': ['$margin_used', 0.0]}, margin_change]},
+                    'total_pnl': {'$ifNull': ['$total_pnl', 0.0]},
+                    'realized_pnl': {'$ifNull': ['$realized_pnl', 0.0]},
+                    'unrealized_pnl': {'$ifNull': ['$unrealized_pnl', 0.0]},
+                    'created_at': {'$ifNull': ['$created_at', now]},
+                    'updated_at': now
+                }},
+                {'$set': {
+                    'margin_available': {'$subtract': ['$cash_balance', '$margin_used']}
+                }}
+            ],
+            projection={'_id': 0, 'cash_balance': 1, 'margin_used': 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
         
         logger.info("portfolio_updated",
-                   cash=new_cash,
-                   margin_used=new_margin_used)
+                   cash=portfolio['cash_balance'],
+                   margin_used=portfolio['margin_used'])
     
     def cancel_order(self, user_id: str, order_id: str) -> bool:
         """Cancel pending order"""
@@ -343,11 +405,10 @@ class OrderManagementSystem:
     
     def _get_current_price(self, symbol: str) -> float:
         """Get current option price"""
-        # Try Redis cache
-        import json
-        cached = self.redis.get(f"price:{symbol}")
+        # Try Redis cache (stored as a bare float string)
+        cached = self.redis.get(_price_key(symbol))
         if cached:
-            return float(json.loads(cached))
+            return float(cached)
         
         # Fallback to last trade or default
         last_trade = self.db.trades.find_one(
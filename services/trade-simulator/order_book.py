@@ -8,66 +8,86 @@ Maintains order book for each option symbol with:
 - Realistic slippage
 """
 
-import random
+import sys
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 import structlog
 
 logger = structlog.get_logger()
 
+# Shared RNG for depth generation
+_rng = np.random.default_rng()
+
+
+def _sweep_levels(prices: np.ndarray, qtys: np.ndarray, quantity: int, levels: int) -> List[Tuple[float, int]]:
+    """Walk the first `levels` price levels and return (price, quantity) fills
+    
+    Runs as a cumulative-depth search instead of a per-level Python loop.
+    Levels are assumed to be sorted best-first.
+    """
+    if quantity <= 0 or levels <= 0:
+        return []
+    
+    cum_qty = np.cumsum(qtys[:levels])
+    # Number of levels touched before the order is fully covered
+    touched = min(int(np.searchsorted(cum_qty, quantity)) + 1, levels)
+    fill_qtys = np.diff(np.minimum(cum_qty[:touched], quantity), prepend=0)
+    
+    return list(zip(prices[:touched].tolist(), fill_qtys.tolist()))
+
 
 class OrderBook:
-    """Order book for a single symbol"""
+    """Order book for a single symbol
+    
+    Each side is stored as parallel arrays (price, quantity, timestamp),
+    sorted best-first: bids descending, asks ascending.
+    """
+    
+    __slots__ = (
+        'symbol', 'mid_price', 'last_trade_price',
+        'bid_prices', 'bid_qtys', 'bid_ts',
+        'ask_prices', 'ask_qtys', 'ask_ts',
+    )
     
     def __init__(self, symbol: str, mid_price: float):
         self.symbol = symbol
         self.mid_price = mid_price
-        self.bids = []  # [(price, quantity, timestamp), ...]
-        self.asks = []  # [(price, quantity, timestamp), ...]
         self.last_trade_price = mid_price
         
         # Initialize with realistic market depth
         self._initialize_depth()
     
-    def _initialize_depth(self):
+    def _initialize_depth(self, levels: int = 5):
         """Create realistic bid/ask spread with depth"""
         # Typical option spread: 0.5% to 2% of mid price
-        spread_pct = random.uniform(0.005, 0.02)
+        spread_pct = _rng.uniform(0.005, 0.02)
         spread = self.mid_price * spread_pct
         
         # Best bid/ask
         best_bid = self.mid_price - spread / 2
         best_ask = self.mid_price + spread / 2
         
-        # Create 5 levels of depth on each side
-        levels = 5
-        for i in range(levels):
-            # Bids (decreasing prices)
-            bid_price = best_bid - (i * spread * 0.5)
-            bid_qty = random.randint(50, 500)  # Random liquidity
-            self.bids.append((bid_price, bid_qty, datetime.now()))
-            
-            # Asks (increasing prices)
-            ask_price = best_ask + (i * spread * 0.5)
-            ask_qty = random.randint(50, 500)
-            self.asks.append((ask_price, ask_qty, datetime.now()))
+        # Create levels of depth on each side in one vectorized pass
+        offsets = np.arange(levels) * spread * 0.5
+        self.bid_prices = best_bid - offsets  # Bids descending
+        self.ask_prices = best_ask + offsets  # Asks ascending
+        self.bid_qtys, self.ask_qtys = _rng.integers(50, 501, size=(2, levels), dtype=np.int32)  # Random liquidity
         
-        # Sort: bids descending, asks ascending
-        self.bids.sort(key=lambda x: x[0], reverse=True)
-        self.asks.sort(key=lambda x: x[0])
+        now = np.datetime64(datetime.now())
+        self.bid_ts = np.full(levels, now)
+        self.ask_ts = np.full(levels, now)
     
     def get_best_bid(self) -> Optional[Tuple[float, int]]:
         """Get best bid price and quantity"""
-        if self.bids:
-            price, qty, _ = self.bids[0]
-            return (price, qty)
+        if self.bid_prices.size:
+            return (self.bid_prices[0].item(), self.bid_qtys[0].item())
         return None
     
     def get_best_ask(self) ->  Optional[Tuple[float, int]]:
         """Get best ask price and quantity"""
-        if self.asks:
-            price, qty, _ = self.asks[0]
-            return (price, qty)
+        if self.ask_prices.size:
+            return (self.ask_prices[0].item(), self.ask_qtys[0].item())
         return None
     
     def get_bid_ask_spread(self) -> float:
@@ -84,49 +104,33 @@ class OrderBook:
         
         Returns list of (price, quantity) fills
         """
-        fills = []
-        remaining = quantity
+        fills = _sweep_levels(self.ask_prices, self.ask_qtys, quantity, self.ask_prices.size)
         
-        while remaining > 0 and self.asks:
-            ask_price, ask_qty, ask_time = self.asks[0]
-            
-            fill_qty = min(remaining, ask_qty)
-            fills.append((ask_price, fill_qty))
-            
-            remaining -= fill_qty
-            
-            # Update or remove ask level
-            if fill_qty < ask_qty:
-                self.asks[0] = (ask_price, ask_qty - fill_qty, ask_time)
-            else:
-                self.asks.pop(0)
-        
-        # Update last trade price
         if fills:
+            # Consume filled depth and drop exhausted levels
+            self.ask_qtys[:len(fills)] -= [qty for _, qty in fills]
+            depleted = int(np.count_nonzero(self.ask_qtys[:len(fills)] == 0))
+            self.ask_prices = self.ask_prices[depleted:]
+            self.ask_qtys = self.ask_qtys[depleted:]
+            self.ask_ts = self.ask_ts[depleted:]
+            
+            # Update last trade price
             self.last_trade_price = fills[-1][0]
         
         return fills
     
     def match_market_sell(self, quantity: int) -> List[Tuple[float, int]]:
         """Match market sell order against bids"""
-        fills = []
-        remaining = quantity
-        
-        while remaining > 0 and self.bids:
-            bid_price, bid_qty, bid_time = self.bids[0]
-            
-            fill_qty = min(remaining, bid_qty)
-            fills.append((bid_price, fill_qty))
-            
-            remaining -= fill_qty
-            
-            # Update or remove bid level
-            if fill_qty < bid_qty:
-                self.bids[0] = (bid_price, bid_qty - fill_qty, bid_time)
-            else:
-                self.bids.pop(0)
+        fills = _sweep_levels(self.bid_prices, self.bid_qtys, quantity, self.bid_prices.size)
         
         if fills:
+            # Consume filled depth and drop exhausted levels
+            self.bid_qtys[:len(fills)] -= [qty for _, qty in fills]
+            depleted = int(np.count_nonzero(self.bid_qtys[:len(fills)] == 0))
+            self.bid_prices = self.bid_prices[depleted:]
+            self.bid_qtys = self.bid_qtys[depleted:]
+            self.bid_ts = self.bid_ts[depleted:]
+            
             self.last_trade_price = fills[-1][0]
         
         return fills
@@ -136,71 +140,27 @@ class OrderBook:
         
         Returns fills if executable, None otherwise
         """
-        best_ask = self.get_best_ask()
-        if not best_ask:
-            return None
-        
-        # Limit buy fills if ask <= limit price
-        if best_ask[0] <= price:
-            # Can fill at market (walk the book)
-            fills = []
-            remaining = quantity
-            
-            for ask_price, ask_qty, _ in self.asks:
-                if ask_price > price:
-                    break  # Can't fill at higher price
-                
-                fill_qty = min(remaining, ask_qty)
-                fills.append((ask_price, fill_qty))
-                remaining -= fill_qty
-                
-                if remaining == 0:
-                    break
-            
-            return fills if fills else None
+        # Limit buy fills against asks <= limit price (walk the book)
+        levels = int(np.searchsorted(self.ask_prices, price, side='right'))
+        fills = _sweep_levels(self.ask_prices, self.ask_qtys, quantity, levels)
         
-        return None
+        return fills if fills else None
     
     def check_limit_sell(self, price: float, quantity: int) -> Optional[List[Tuple[float, int]]]:
         """Check if limit sell can be filled"""
-        best_bid = self.get_best_bid()
-        if not best_bid:
-            return None
-        
-        # Limit sell fills if bid >= limit price
-        if best_bid[0] >= price:
-            fills = []
-            remaining = quantity
-            
-            for bid_price, bid_qty, _ in self.bids:
-                if bid_price < price:
-                    break
-                
-                fill_qty = min(remaining, bid_qty)
-                fills.append((bid_price, fill_qty))
-                remaining -= fill_qty
-                
-                if remaining == 0:
-                    break
-            
-            return fills if fills else None
+        # Limit sell fills against bids >= limit price
+        levels = int(np.count_nonzero(self.bid_prices >= price))
+        fills = _sweep_levels(self.bid_prices, self.bid_qtys, quantity, levels)
         
-        return None
+        return fills if fills else None
     
     def update_market_price(self, new_mid_price: float):
         """Update order book when market moves"""
         price_change_pct = (new_mid_price - self.mid_price) / self.mid_price
         
         # Shift all bid/ask levels proportionally
-        self.bids = [
-            (price * (1 + price_change_pct), qty, timestamp)
-            for price, qty, timestamp in self.bids
-        ]
-        
-        self.asks = [
-            (price * (1 + price_change_pct), qty, timestamp)
-            for price, qty, timestamp in self.asks
-        ]
+        self.bid_prices = self.bid_prices * (1 + price_change_pct)
+        self.ask_prices = self.ask_prices * (1 + price_change_pct)
         
         self.mid_price = new_mid_price
     
@@ -211,14 +171,16 @@ class OrderBook:
             'mid_price': self.mid_price,
             'last_trade': self.last_trade_price,
             'spread': self.get_bid_ask_spread(),
-            'bids': [(price, qty) for price, qty, _ in self.bids[:10]],
-            'asks': [(price, qty) for price, qty, _ in self.asks[:10]]
+            'bids': list(zip(self.bid_prices[:10].tolist(), self.bid_qtys[:10].tolist())),
+            'asks': list(zip(self.ask_prices[:10].tolist(), self.ask_qtys[:10].tolist()))
         }
 
 
 class OrderBookManager:
     """Manages order books for all symbols"""
     
+    __slots__ = ('redis', 'order_books')
+    
     def __init__(self, redis_client):
         self.redis = redis_client
         self.order_books: Dict[str, OrderBook] = {}
@@ -227,6 +189,7 @@ class OrderBookManager:
     def get_or_create_book(self, symbol: str, current_price: float) -> OrderBook:
         """Get existing order book or create new one"""
         if symbol not in self.order_books:
+            symbol = sys.intern(symbol)
             self.order_books[symbol] = OrderBook(symbol, current_price)
             logger.info("order_book_created", symbol=symbol, price=current_price)
         
@@ -9,12 +9,92 @@ Handles:
 - Performance metrics
 """
 
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Tuple
+import numpy as np
 import structlog
 
 logger = structlog.get_logger()
 
+# Period name -> start time given the current time
+_PERIOD_START = {
+    'today': lambda now: now.replace(hour=0, minute=0, second=0, microsecond=0),
+    'week': lambda now: now - timedelta(days=7),
+    'month': lambda now: now - timedelta(days=30),
+    'year': lambda now: now - timedelta(days=365),
+    'all': lambda now: datetime(2020, 1, 1),
+}
+
+
+def realized_pnl_key(user_id: str) -> str:
+    """Redis hash caching a user's realized P&L (one field per period)"""
+    return f"pnl:{user_id}"
+
+
+def _fifo_realized_pnl(buys: List[Dict], sells: List[Dict]) -> float:
+    """FIFO-match sells against buys for one symbol and return realized P&L
+    
+    Buys are laid out as [start, end) intervals of cumulative quantity;
+    each sell consumes the next `quantity` units, so its matches are the
+    overlaps with those intervals, computed as array slices.
+    Commission of both legs is charged for every matched buy/sell pair.
+    """
+    if not buys or not sells:
+        return 0.0
+    
+    buy_qty = np.array([b['quantity'] for b in buys], dtype=np.float64)
+    buy_unit_price = np.array([b['value'] for b in buys], dtype=np.float64) / buy_qty
+    buy_commission = np.array([b['commission'] for b in buys], dtype=np.float64)
+    buy_end = np.cumsum(buy_qty)
+    buy_start = buy_end - buy_qty
+    total_bought = buy_end[-1]
+    
+    total_realized = 0.0
+    filled = 0.0
+    
+    for sell in sells:
+        if filled >= total_bought:
+            break  # All buys fully matched
+        
+        sell_qty = sell['quantity']
+        sell_unit_price = sell['value'] / sell_qty
+        upto = min(filled + sell_qty, total_bought)
+        
+        # Buys overlapping [filled, upto)
+        i = int(np.searchsorted(buy_end, filled, side='right'))
+        j = int(np.searchsorted(buy_start, upto, side='left'))
+        match_qty = np.minimum(buy_end[i:j], upto) - np.maximum(buy_start[i:j], filled)
+        
+        pnl = ((sell_unit_price - buy_unit_price[i:j]) * match_qty).sum()
+        commission = buy_commission[i:j].sum() + (j - i) * sell['commission']
+        total_realized += float(pnl - commission)
+        
+        filled = upto
+    
+    return total_realized
+
+
+def _paired_trade_pnls(trades: List[Dict]) -> np.ndarray:
+    """Pair sells with buys of the same symbol (FIFO) and return pair P&Ls
+    
+    Expects trades newest-first, as returned by get_trade_history.
+    Each buy is consumed by at most one sell; sells with no open buy
+    for their symbol are skipped.
+    """
+    open_buys = defaultdict(deque)
+    pnls = []
+    
+    for trade in reversed(trades):  # Chronological order
+        queue = open_buys[trade['symbol']]
+        if trade['side'] == 'BUY':
+            queue.append(trade)
+        elif queue:
+            buy = queue.popleft()
+            pnls.append(trade['value'] - buy['value'] - trade['commission'] - buy['commission'])
+    
+    return np.array(pnls, dtype=np.float64)
+
 
 class PortfolioManager:
     """Portfolio and position management"""
@@ -26,14 +106,7 @@ class PortfolioManager:
     
     def get_portfolio(self, user_id: str) -> Dict:
         """Get portfolio summary"""
-        portfolio = self.db.portfolios.find_one(
-            {'user_id': user_id},
-            {'_id': 0}
-        )
-        
-        if not portfolio:
-            # Create initial portfolio
-            portfolio = self._create_initial_portfolio(user_id)
+        portfolio = self._load_portfolio(user_id)
         
         # Update with latest P&L
         portfolio = self._update_portfolio_pnl(user_id, portfolio)
@@ -48,8 +121,9 @@ class PortfolioManager:
         ))
         
         # Update each position with current price and P&L
+        prices = self._get_current_prices([p['symbol'] for p in positions])
         for position in positions:
-            current_price = self._get_current_price(position['symbol'])
+            current_price = prices[position['symbol']]
             position['current_price'] = current_price
             position['unrealized_pnl'] = self._calculate_unrealized_pnl(position, current_price)
         
@@ -57,11 +131,8 @@ class PortfolioManager:
     
     def get_pnl_summary(self, user_id: str, period: str = 'all') -> Dict:
         """Get P&L summary for period"""
-        # Get time filter
-        start_time = self._get_period_start(period)
-        
         # Realized P&L from closed trades
-        realized_pnl = self._calculate_realized_pnl(user_id, start_time)
+        realized_pnl = self._get_realized_pnl(user_id, period)
         
         # Unrealized P&L from open positions
         positions = self.get_positions(user_id)
@@ -69,8 +140,10 @@ class PortfolioManager:
         
         total_pnl = realized_pnl + unrealized_pnl
         
+        # Refresh stored portfolio P&L, reusing the priced positions
+        self._update_portfolio_pnl(user_id, self._load_portfolio(user_id), positions=positions)
+        
         # Calculate returns
-        portfolio = self.get_portfolio(user_id)
         initial_capital = 1000000.0  # 10 lakh
         returns_pct = (total_pnl / initial_capital) * 100
         
@@ -84,18 +157,26 @@ class PortfolioManager:
             'current_value': initial_capital + total_pnl
         }
     
-    def get_trade_history(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Get trade history"""
+    def get_trade_history(self, user_id: str, limit: int = 50, fields: Tuple[str, ...] = None) -> List[Dict]:
+        """Get trade history, newest first
+        
+        `fields` narrows the projection (default: every trade field).
+        """
+        projection = {'_id': 0}
+        if fields:
+            projection.update(dict.fromkeys(fields, 1))
+        
         trades = list(self.db.trades.find(
             {'user_id': user_id},
-            {'_id': 0}
+            projection
         ).sort('executed_at', -1).limit(limit))
         
         return trades
     
     def get_performance_metrics(self, user_id: str) -> Dict:
         """Calculate performance metrics"""
-        trades = self.get_trade_history(user_id, limit=1000)
+        # Only the fields the metrics read
+        trades = self.get_trade_history(user_id, limit=1000, fields=('symbol', 'side', 'value', 'commission'))
         
         if not trades:
             return {
@@ -110,29 +191,15 @@ class PortfolioManager:
         # Calculate metrics
         total_trades = len(trades)
         
-        # P&L per trade (simplified - assumes paired trades)
-        buy_trades = [t for t in trades if t['side'] == 'BUY']
-        sell_trades = [t for t in trades if t['side'] == 'SELL']
-        
-        winning_trades = 0
-        total_profit = 0
-        total_loss = 0
-        
-        # Match buy-sell pairs
-        for sell in sell_trades:
-            matching_buy = next(
-                (b for b in buy_trades if b['symbol'] == sell['symbol']),
-                None
-            )
-            if matching_buy:
-                pnl = sell['value'] - matching_buy['value'] - sell['commission'] - matching_buy['commission']
-                if pnl > 0:
-                    winning_trades += 1
-                    total_profit += pnl
-                else:
-                    total_loss += abs(pnl)
-        
-        num_closed = min(len(buy_trades), len(sell_trades))
+        # P&L per closed buy/sell pair
+        pair_pnls = _paired_trade_pnls(trades)
+        
+        wins = pair_pnls > 0
+        winning_trades = int(np.count_nonzero(wins))
+        total_profit = float(pair_pnls[wins].sum())
+        total_loss = float(-pair_pnls[~wins].sum())
+        
+        num_closed = len(pair_pnls)
         win_rate = (winning_trades / num_closed * 100) if num_closed > 0 else 0
         avg_profit = total_profit / winning_trades if winning_trades > 0 else 0
         avg_loss = total_loss / (num_closed - winning_trades) if (num_closed - winning_trades) > 0 else 0
@@ -149,8 +216,22 @@ class PortfolioManager:
             'total_loss': total_loss
         }
     
+    def _load_portfolio(self, user_id: str) -> Dict:
+        """Get stored portfolio, creating the initial one if missing"""
+        portfolio = self.db.portfolios.find_one(
+            {'user_id': user_id},
+            {'_id': 0}
+        )
+        
+        if not portfolio:
+            # Create initial portfolio
+            portfolio = self._create_initial_portfolio(user_id)
+        
+        return portfolio
+    
     def _create_initial_portfolio(self, user_id: str) -> Dict:
         """Create initial portfolio with starting capital"""
+        now = datetime.now()
         portfolio = {
             'user_id': user_id,
             'cash_balance': 1000000.0,  # Rs. 10 lakh
@@ -159,8 +240,8 @@ class PortfolioManager:
             'total_pnl': 0.0,
             'realized_pnl': 0.0,
             'unrealized_pnl': 0.0,
-            'created_at': datetime.now(),
-            'updated_at': datetime.now()
+            'created_at': now,
+            'updated_at': now
         }
         
         self.db.portfolios.insert_one(portfolio)
@@ -169,24 +250,35 @@ class PortfolioManager:
         logger.info("initial_portfolio_created", user_id=user_id)
         return portfolio
     
-    def _update_portfolio_pnl(self, user_id: str, portfolio: Dict) -> Dict:
-        """Update portfolio with latest P&L"""
+    def _update_portfolio_pnl(self, user_id: str, portfolio: Dict, positions: List[Dict] = None) -> Dict:
+        """Update portfolio with latest P&L
+        
+        `positions` may be passed already priced (from get_positions) to
+        skip loading and pricing them again.
+        """
         # Realized P&L
-        realized = self._calculate_realized_pnl(user_id)
+        realized = self._get_realized_pnl(user_id, 'all')
         
         # Unrealized P&L from positions
-        positions = list(self.db.positions.find({'user_id': user_id}))
-        unrealized = 0.0
-        
-        for position in positions:
-            current_price = self._get_current_price(position['symbol'])
-            unrealized += self._calculate_unrealized_pnl(position, current_price)
+        if positions is None:
+            positions = self.get_positions(user_id)
+        unrealized = sum((p['unrealized_pnl'] for p in positions), 0.0)
+        
+        # Stored values are what the last call persisted; skip the write
+        # when nothing moved (the common case for repeated GETs)
+        unchanged = (
+            abs(portfolio.get('realized_pnl', 0.0) - realized) < 1e-6
+            and abs(portfolio.get('unrealized_pnl', 0.0) - unrealized) < 1e-6
+        )
         
         # Update portfolio
         portfolio['realized_pnl'] = realized
         portfolio['unrealized_pnl'] = unrealized
         portfolio['total_pnl'] = realized + unrealized
         
+        if unchanged:
+            return portfolio
+        
         # Persist to DB
         self.db.portfolios.update_one(
             {'user_id': user_id},
@@ -200,19 +292,35 @@ class PortfolioManager:
         
         return portfolio
     
-    def _calculate_unrealized_pnl(self, position: Dict, current_price: float) -> float:
-        """Calculate mark-to-market P&L for position"""
-        quantity = position['quantity']
-        entry_price = position['avg_entry_price']
+    @staticmethod
+    def _calculate_unrealized_pnl(position: Dict, current_price: float) -> float:
+        """Calculate mark-to-market P&L for position
+        
+        Signed quantity handles shorts: a short gains when price falls.
+        """
+        return (current_price - position['avg_entry_price']) * position['quantity']
+    
+    def _get_realized_pnl(self, user_id: str, period: str) -> float:
+        """Get realized P&L for period, cached in Redis
+        
+        Cached per user in the realized_pnl_key() hash for 60s; the OMS
+        drops it via rms.invalidate_context() whenever the user gets a fill.
+        """
+        period = period if period in _PERIOD_START else 'all'
+        cache_key = realized_pnl_key(user_id)
         
-        pnl_per_unit = current_price - entry_price
-        unrealized_pnl = pnl_per_unit * abs(quantity)
+        cached = self.redis.hget(cache_key, period)
+        if cached is not None:
+            return float(cached)
         
-        # Adjust sign for short positions
-        if quantity < 0:
-            unrealized_pnl = -unrealized_pnl
+        realized = self._calculate_realized_pnl(user_id, self._get_period_start(period))
         
-        return unrealized_pnl
+        pipe = self.redis.pipeline()
+        pipe.hset(cache_key, period, realized)
+        pipe.expire(cache_key, 60)
+        pipe.execute()
+        
+        return realized
     
     def _calculate_realized_pnl(self, user_id: str, start_time: datetime = None) -> float:
         """Calculate realized P&L from closed trades"""
@@ -220,7 +328,11 @@ class PortfolioManager:
         if start_time:
             query['executed_at'] = {'$gte': start_time}
         
-        trades = list(self.db.trades.find(query))
+        # Oldest first for FIFO matching; only the fields the matcher reads
+        trades = list(self.db.trades.find(
+            query,
+            {'_id': 0, 'symbol': 1, 'side': 1, 'quantity': 1, 'value': 1, 'commission': 1}
+        ).sort('executed_at', 1))
         
         # Group by symbol to find closed positions
         symbol_trades = {}
@@ -238,70 +350,50 @@ class PortfolioManager:
         total_realized = 0.0
         
         for symbol, trades_dict in symbol_trades.items():
-            buys = trades_dict['buys']
-            sells = trades_dict['sells']
-            
-            # FIFO matching
-            for sell in sells:
-                sell_qty = sell['quantity']
-                sell_value = sell['value']
-                
-                for buy in buys:
-                    if buy.get('matched', 0) >= buy['quantity']:
-                        continue  # Fully matched
-                    
-                    available = buy['quantity'] - buy.get('matched', 0)
-                    match_qty = min(sell_qty, available)
-                    
-                    # Calculate P&L
-                    buy_cost = (buy['value'] / buy['quantity']) * match_qty
-                    sell_revenue = (sell['value'] / sell['quantity']) * match_qty
-                    commission = buy['commission'] + sell['commission']
-                    
-                    pnl = sell_revenue - buy_cost - commission
-                    total_realized += pnl
-                    
-                    # Mark quantities as matched
-                    buy['matched'] = buy.get('matched', 0) + match_qty
-                    sell_qty -= match_qty
-                    
-                    if sell_qty == 0:
-                        break
+            total_realized += _fifo_realized_pnl(trades_dict['buys'], trades_dict['sells'])
         
         return total_realized
     
     def _get_current_price(self, symbol: str) -> float:
         """Get current price for symbol"""
-        import json
+        return self._get_current_prices([symbol])[symbol]
+    
+    def _get_current_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Get current prices for symbols in ~2 round-trips
+        
+        One Redis MGET for cached prices, then one aggregation over
+        trades for the last traded price of any cache misses.
+        """
+        symbols = list(dict.fromkeys(symbols))  # Dedupe, keep order
+        if not symbols:
+            return {}
         
         # Try Redis cache
-        cached = self.redis.get(f"price:{symbol}")
-        if cached:
-            return float(json.loads(cached))
-        
-        # Try last trade
-        last_trade = self.db.trades.find_one(
-            {'symbol': symbol},
-            sort=[('executed_at', -1)]
-        )
+        cached = self.redis.mget([f"price:{symbol}" for symbol in symbols])
+        prices = {
+            symbol: float(value)
+            for symbol, value in zip(symbols, cached)
+            if value
+        }
         
-        if last_trade:
-            return last_trade['price']
+        # Try last trade for cache misses
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            last_trades = self.db.trades.aggregate([
+                {'$match': {'symbol': {'$in': missing}}},
+                {'$sort': {'executed_at': -1}},
+                {'$group': {'_id': '$symbol', 'price': {'$first': '$price'}}}
+            ])
+            for trade in last_trades:
+                prices[trade['_id']] = trade['price']
         
         # Fallback
-        return 100.0
+        for symbol in missing:
+            prices.setdefault(symbol, 100.0)
+        
+        return prices
     
     def _get_period_start(self, period: str) -> datetime:
         """Get start time for period"""
-        now = datetime.now()
-        
-        if period == 'today':
-            return now.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif period == 'week':
-            return now - timedelta(days=7)
-        elif period == 'month':
-            return now - timedelta(days=30)
-        elif period == 'year':
-            return now - timedelta(days=365)
-        else:  # 'all'
-            return datetime(2020, 1, 1)
+        start_fn = _PERIOD_START.get(period, _PERIOD_START['all'])
+        return start_fn(datetime.now())
@@ -10,10 +10,16 @@ Pre-trade risk checks:
 - Concentration limits
 """
 
+import time
+import numpy as np
+import orjson
 import structlog
-from typing import Dict, Optional
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
+from portfolio import realized_pnl_key
+
 logger = structlog.get_logger()
 
 
@@ -47,6 +53,15 @@ class ConcentrationLimitError(RiskLimitError):
     pass
 
 
+@dataclass
+class RiskContext:
+    """Portfolio and position state shared by the pre-trade checks"""
+    portfolio: Optional[Dict]
+    exposure_by_product: Dict[str, float]
+    quantity_by_symbol: Dict[str, int]
+    unrealized_pnl: float
+
+
 class RiskManagementSystem:
     """Risk management and compliance checks"""
     
@@ -66,6 +81,7 @@ class RiskManagementSystem:
         self.db = db
         self.redis = redis_client
         self.limits = self.DEFAULT_LIMITS.copy()
+        self._underlying_cache: Dict[str, Tuple[int, float]] = {}  # product -> (second, price)
         logger.info("rms_initialized", limits=self.limits)
     
     def calculate_margin(self, order: Dict, current_price: float) -> float:
@@ -88,46 +104,102 @@ class RiskManagementSystem:
     
         else:  # SELL
             # Selling options = SPAN margin
-            # Simplified: 18% of underlying value per lot
+            # Simplified: 18% of underlying value per lot. Per-lot margin
+            # times number of lots is (upx * lot * 0.18) * (qty / lot), so
+            # lot size cancels and no per-product lookup is needed.
             underlying_price = self._get_underlying_price(order['product'])
-            lot_size = self._get_lot_size(order['product'])
-            margin_per_lot = underlying_price * lot_size * 0.18
-            num_lots = quantity / lot_size
             
-            margin = margin_per_lot * num_lots * self.limits['margin_multiplier_sell']
+            margin = underlying_price * quantity * 0.18 * self.limits['margin_multiplier_sell']
             return margin
     
-    def pre_trade_risk_check(self, user_id: str, order: Dict, current_price: float) -> bool:
+    def pre_trade_risk_check(self, user_id: str, order: Dict, current_price: float, *,
+                             now: Optional[datetime] = None) -> bool:
         """Perform all pre-trade risk checks
         
+        `now` lets the caller share one clock read (e.g. the order's
+        placed_at) across all checks.
+        
         Raises RiskLimitError if any check fails
         """
         logger.info("pre_trade_check",  user_id=user_id, order_id=order.get('order_id'))
         
-        # 1. Check margin availability
-        self._check_margin(user_id, order, current_price)
+        # 1. Check order value (no I/O - reject bad orders before any DB access)
+        self._check_order_value(order, current_price)
         
-        # 2. Check position limits
-        self._check_position_limits(user_id, order)
+        # Load portfolio/positions once for the remaining checks
+        ctx = self._load_context(user_id)
         
-        # 3. Check order value
-        self._check_order_value(order, current_price)
+        # 2. Check margin availability
+        self._check_margin(order, current_price, ctx)
+        
+        # 3. Check position limits
+        self._check_position_limits(order, ctx)
         
         # 4. Check daily loss limit
-        self._check_daily_loss(user_id)
+        self._check_daily_loss(user_id, ctx, now)
         
         # 5. Check concentration
-        self._check_concentration(user_id, order, current_price)
+        self._check_concentration(order, current_price, ctx)
         
         logger.info("risk_check_passed", user_id=user_id, order_id=order.get('order_id'))
         return True
     
-    def _check_margin(self, user_id: str, order: Dict, current_price: float):
+    def _load_context(self, user_id: str) -> RiskContext:
+        """Load portfolio and a per-product position summary for pre-trade checks
+        
+        Cached in Redis for 500 ms so bursts of orders share one read;
+        invalidated by invalidate_context() after an order fills.
+        """
+        cache_key = f"riskctx:{user_id}"
+        cached = self.redis.get(cache_key)
+        if cached:
+            return RiskContext(**orjson.loads(cached))
+        
+        portfolio = self.db.portfolios.find_one(
+            {'user_id': user_id},
+            {'_id': 0, 'cash_balance': 1, 'margin_used': 1, 'margin_available': 1}
+        )
+        
+        # Summarize positions per product server-side
+        exposure_by_product = {}
+        quantity_by_symbol = {}
+        unrealized_pnl = 0.0
+        
+        for group in self.db.positions.aggregate([
+            {'$match': {'user_id': user_id}},
+            {'$group': {
+                '_id': '$product',
+                'exposure': {'$sum': {'$abs': {'$multiply': [
+                    '$quantity',
+                    {'$ifNull': ['$current_price', '$avg_entry_price']}
+                ]}}},
+                'unrealized_pnl': {'$sum': '$unrealized_pnl'},
+                'positions': {'$push': {'symbol': '$symbol', 'quantity': '$quantity'}}
+            }}
+        ]):
+            exposure_by_product[group['_id']] = group['exposure']
+            unrealized_pnl += group['unrealized_pnl']
+            for position in group['positions']:
+                quantity_by_symbol[position['symbol']] = position['quantity']
+        
+        ctx = RiskContext(
+            portfolio=portfolio,
+            exposure_by_product=exposure_by_product,
+            quantity_by_symbol=quantity_by_symbol,
+            unrealized_pnl=unrealized_pnl
+        )
+        self.redis.set(cache_key, orjson.dumps(asdict(ctx)), px=500)
+        return ctx
+    
+    def invalidate_context(self, user_id: str):
+        """Drop cached risk and P&L state after the user's portfolio changes"""
+        self.redis.delete(f"riskctx:{user_id}", f"dailypnl:{user_id}", realized_pnl_key(user_id))
+    
+    def _check_margin(self, order: Dict, current_price: float, ctx: RiskContext):
         """Check if user has sufficient margin"""
         required_margin = self.calculate_margin(order, current_price)
         
-        # Get portfolio
-        portfolio = self.db.portfolios.find_one({'user_id': user_id})
+        portfolio = ctx.portfolio
         if not portfolio:
             raise InsufficientFundsError("Portfolio not found")
         
@@ -143,13 +215,11 @@ class RiskManagementSystem:
                    required=required_margin,
                    available=available_margin)
     
-    def _check_position_limits(self, user_id: str, order: Dict):
+    def _check_position_limits(self, order: Dict, ctx: RiskContext):
         """Check if opening new position would exceed limits"""
-        if order['side'] == 'SELL' and not self._has_offsetting_position(user_id, order):
+        if order['side'] == 'SELL' and not self._has_offsetting_position(order, ctx):
             # Opening new short position
-            current_positions = list(self.db.positions.find({'user_id': user_id}))
-            
-            if len(current_positions) >= self.limits['max_open_positions']:
+            if len(ctx.quantity_by_symbol) >= self.limits['max_open_positions']:
                 raise PositionLimitError(
                     f"Maximum {self.limits['max_open_positions']} positions allowed"
                 )
@@ -157,7 +227,10 @@ class RiskManagementSystem:
     def _check_order_value(self, order: Dict, current_price: float):
         """Check if order value exceeds limit"""
         quantity = order['quantity']
-        price = order.get('price', current_price)
+        if quantity <= 0:
+            raise OrderValueLimitError(f"Order quantity must be positive, got {quantity}")
+        
+        price = order.get('price') or current_price  # Market orders carry price=None
         order_value = quantity * price
         
         if order_value > self.limits['max_order_value']:
@@ -166,27 +239,35 @@ class RiskManagementSystem:
                 f"{self.limits['max_order_value']:.2f}"
             )
     
-    def _check_daily_loss(self, user_id: str):
+    def _check_daily_loss(self, user_id: str, ctx: RiskContext, now: Optional[datetime] = None):
         """Check if daily loss limit exceeded"""
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Get today's trades
-        today_trades = list(self.db.trades.find({
-            'user_id': user_id,
-            'executed_at': {'$gte': today_start}
-        }))
-        
-        # Calculate realized P&L for today
-        realized_pnl = 0
-        for trade in today_trades:
-            if trade['side'] == 'BUY':
-                realized_pnl -= trade['net_value']
-            else:
-                realized_pnl += trade['net_value']
+        # Realized P&L for today, summed server-side (cached briefly for order bursts)
+        cache_key = f"dailypnl:{user_id}"
+        cached = self.redis.get(cache_key)
+        
+        if cached is not None:
+            realized_pnl = float(cached)
+        else:
+            today_start = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+            result = self.db.trades.aggregate([
+                {'$match': {
+                    'user_id': user_id,
+                    'executed_at': {'$gte': today_start}
+                }},
+                {'$group': {
+                    '_id': None,
+                    'pnl': {'$sum': {'$cond': [
+                        {'$eq': ['$side', 'BUY']},
+                        {'$multiply': ['$net_value', -1]},
+                        '$net_value'
+                    ]}}
+                }}
+            ])
+            realized_pnl = next(result, {'pnl': 0})['pnl']
+            self.redis.setex(cache_key, 2, realized_pnl)
         
         # Get unrealized P&L
-        positions = list(self.db.positions.find({'user_id': user_id}))
-        unrealized_pnl = sum(p.get('unrealized_pnl', 0) for p in positions)
+        unrealized_pnl = ctx.unrealized_pnl
         
         total_pnl = realized_pnl + unrealized_pnl
         
@@ -196,24 +277,16 @@ class RiskManagementSystem:
                 f"Current P&L: {total_pnl:.2f}"
             )
     
-    def _check_concentration(self, user_id: str, order: Dict, current_price: float):
+    def _check_concentration(self, order: Dict, current_price: float, ctx: RiskContext):
         """Check if position concentration exceeds limit"""
         product = order['product']
         
         # Get portfolio value
-        portfolio = self.db.portfolios.find_one({'user_id': user_id})
+        portfolio = ctx.portfolio
         total_value = portfolio.get('cash_balance', 0) + portfolio.get('margin_used', 0)
         
-        # Calculate current exposure to this product
-        product_positions = list(self.db.positions.find({
-            'user_id': user_id,
-            'product': product
-        }))
-        
-        current_exposure = sum(
-            abs(p['quantity'] * p.get('current_price', p['avg_entry_price']))
-            for p in product_positions
-        )
+        # Current exposure to this product
+        current_exposure = ctx.exposure_by_product.get(product, 0)
         
         # Add this order's value
         order_value = order['quantity'] * current_price
@@ -227,48 +300,59 @@ class RiskManagementSystem:
                 f"{self.limits['max_position_concentration']:.1%}"
             )
     
-    def _has_offsetting_position(self, user_id: str, order: Dict) -> bool:
+    def _has_offsetting_position(self, order: Dict, ctx: RiskContext) -> bool:
         """Check if user has opposite position to offset"""
         symbol = order['symbol']
         
-        position = self.db.positions.find_one({
-            'user_id': user_id,
-            'symbol': symbol
-        })
+        quantity = ctx.quantity_by_symbol.get(symbol)
         
-        if not position:
+        if not quantity:
             return False
         
         # Check if opposite side
-        if order['side'] == 'BUY' and position['quantity'] < 0:
+        if order['side'] == 'BUY' and quantity < 0:
             return True
-        if order['side'] == 'SELL' and position['quantity'] > 0:
+        if order['side'] == 'SELL' and quantity > 0:
             return True
         
         return False
     
     def _get_underlying_price(self, product: str) -> float:
         """Get current underlying price from cache/DB"""
-        # Try Redis cache first
-        cache_key = f"latest:underlying:{product}"
-        cached = self.redis.get(cache_key)
+        return self._get_underlying_prices([product])[product]
+    
+    def _get_underlying_prices(self, products: List[str]) -> Dict[str, float]:
+        """Get current underlying prices for products
         
-        if cached:
-            import json
-            data = json.loads(cached)
-            return data.get('price', 21500)  # Fallback
+        Prices are memoized per instance for the current second; any
+        products not seen this second are fetched with a single MGET.
+        """
+        bucket = int(time.time())
+        prices = {}
+        missing = []
+        
+        for product in dict.fromkeys(products):
+            cached = self._underlying_cache.get(product)
+            if cached and cached[0] == bucket:
+                prices[product] = cached[1]
+            else:
+                missing.append(product)
         
-        # Default fallback
-        return 21500 if product == 'NIFTY' else 46000
-    
-    def _get_lot_size(self, product: str) -> int:
-        """Get lot size for product"""
-        lot_sizes = {
-            'NIFTY': 50,
-            'BANKNIFTY': 25,
-            'FINNIFTY': 40
-        }
-        return lot_sizes.get(product, 50)
+        if missing:
+            # Try Redis cache first
+            values = self.redis.mget([f"latest:underlying:{product}" for product in missing])
+            
+            for product, cached in zip(missing, values):
+                if cached:
+                    price = orjson.loads(cached).get('price', 21500)  # Fallback
+                else:
+                    # Default fallback
+                    price = 21500 if product == 'NIFTY' else 46000
+                
+                self._underlying_cache[product] = (bucket, price)
+                prices[product] = price
+        
+        return prices
     
     def get_risk_metrics(self, user_id: str) -> Dict:
         """Get current risk metrics for user"""
@@ -277,18 +361,27 @@ class RiskManagementSystem:
         
         total_value = portfolio.get('cash_balance', 0) + portfolio.get('margin_used', 0)
         
-        # Calculate exposure by product
-        exposure_by_product = {}
-        for pos in positions:
-            product = pos['product']
-            value = abs(pos['quantity'] * pos.get('current_price', pos['avg_entry_price']))
-            exposure_by_product[product] = exposure_by_product.get(product, 0) + value
+        # Calculate exposure by product (vectorized group-by over positions)
+        n = len(positions)
+        product_ids = {}
+        product_idx = np.fromiter(
+            (product_ids.setdefault(p['product'], len(product_ids)) for p in positions),
+            dtype=np.intp, count=n
+        )
+        quantities = np.fromiter((p['quantity'] for p in positions), dtype=np.float64, count=n)
+        prices = np.fromiter(
+            (p.get('current_price', p['avg_entry_price']) for p in positions),
+            dtype=np.float64, count=n
+        )
+        
+        exposures = np.zeros(len(product_ids))
+        np.add.at(exposures, product_idx, np.abs(quantities * prices))
+        exposure_by_product = dict(zip(product_ids, exposures.tolist()))
         
         # Max concentration
-        max_concentration = max(
-            (exp / total_value for exp in exposure_by_product.values()),
-            default=0
-        ) if total_value > 0 else 0
+        max_concentration = (
+            float(exposures.max()) / total_value if total_value > 0 and exposures.size else 0
+        )
         
         return {
             'margin_used': portfolio.get('margin_used', 0),
@@ -17,14 +17,19 @@ Implements:
 """
 
 import os
-import json
+import bisect
+import time
+import numpy as np
+import orjson
 import redis
 import structlog
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 from celery import Celery, Task
+from celery.signals import worker_init
+from kombu.serialization import register
 from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import math
 
 # Structured logging
@@ -43,19 +48,36 @@ CELERY_BROKER = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/1')
 CELERY_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/2')
 SERVICE_NAME = os.getenv('SERVICE_NAME', 'worker-enricher')
 
+# Green threads per worker (eventlet pool); also sizes the connection pools
+WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', '200'))
+
+# Subscriber dispatch batching
+DISPATCH_BATCH_SIZE = int(os.getenv('DISPATCH_BATCH_SIZE', '100'))
+DISPATCH_INTERVAL = float(os.getenv('DISPATCH_INTERVAL', '0.05'))  # seconds
+
+# OHLC windows (minutes) computed for every underlying tick
+OHLC_WINDOWS = [1, 5, 15]
+
+# Raw ticks/quotes older than this are expired by Mongo (TTL index)
+TICK_RETENTION_SECONDS = int(os.getenv('TICK_RETENTION_SECONDS', '86400'))
+
+# orjson for task messages: faster than stdlib json and encodes straight to bytes
+register('orjson', orjson.dumps, orjson.loads,
+         content_type='application/x-orjson', content_encoding='binary')
+
 # Initialize Celery
 celery_app = Celery('worker-enricher', broker=CELERY_BROKER, backend=CELERY_BACKEND)
 
 # Celery configuration
 celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer='orjson',
+    accept_content=['orjson', 'json'],  # json: messages queued before the switch
+    result_serializer='orjson',
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
     task_acks_late=True,
-    worker_prefetch_multiplier=1,
+    worker_prefetch_multiplier=4,  # I/O-bound tasks on an eventlet pool
     task_reject_on_worker_lost=True,
     # Retry configuration
     task_autoretry_for=(Exception,),
@@ -72,7 +94,13 @@ def get_mongo_client():
     """Get or create MongoDB client (singleton pattern)."""
     global mongo_client
     if mongo_client is None:
-        mongo_client = MongoClient(MONGO_URL)
+        # zstd (zlib fallback) wire compression - enriched chains carry
+        # the full calls/puts arrays
+        mongo_client = MongoClient(
+            MONGO_URL,
+            compressors='zstd,zlib',
+            maxPoolSize=WORKER_CONCURRENCY  # One connection per green thread
+        )
     return mongo_client
 
 
@@ -80,10 +108,66 @@ def get_redis_client():
     """Get or create Redis client (singleton pattern)."""
     global redis_client
     if redis_client is None:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+        redis_client = redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_keepalive=True,
+            max_connections=WORKER_CONCURRENCY + 8,  # + subscriber/pipeline headroom
+            health_check_interval=30  # Detect dead idle connections before use
+        )
     return redis_client
 
 
+@worker_init.connect
+def ensure_indexes(**kwargs):
+    """Create the indexes the worker's queries and writes rely on (idempotent)."""
+    # Short-lived client: this runs once at worker start-up, before the
+    # pool-sized shared client is first used by tasks
+    with MongoClient(MONGO_URL) as client:
+        db = client['deltastream']
+        
+        # OHLC windows: product + timestamp range
+        db.underlying_ticks.create_index([('product', ASCENDING), ('timestamp', DESCENDING)])
+        # Duplicate tick deliveries; timestamp keeps restarted feeds (tick_id reset) distinct
+        try:
+            db.underlying_ticks.create_index(
+                [('product', ASCENDING), ('tick_id', ASCENDING), ('timestamp', ASCENDING)],
+                unique=True
+            )
+        except OperationFailure as e:
+            # e.g. duplicates stored before the index existed - ticks are
+            # still processed, just without duplicate protection
+            logger.error("tick_unique_index_failed", error=str(e))
+        # Volatility surface: product + timestamp range
+        db.option_quotes.create_index([('product', ASCENDING), ('timestamp', DESCENDING)])
+        
+        # Expire raw underlying ticks; option quotes and enriched chains are
+        # kept, since the storage API serves their history
+        db.underlying_ticks.create_index('processed_at', expireAfterSeconds=TICK_RETENTION_SECONDS)
+        # Drop the quote TTL index an earlier release created
+        quote_ttl = db.option_quotes.index_information().get('processed_at_1', {})
+        if 'expireAfterSeconds' in quote_ttl:
+            db.option_quotes.drop_index('processed_at_1')
+    
+    logger.info("indexes_ensured", tick_retention_seconds=TICK_RETENTION_SECONDS)
+
+
+# Feed message as published (raw JSON), or already parsed
+FeedPayload = Union[str, bytes, Dict[str, Any]]
+
+
+def load_payload(payload: FeedPayload) -> Dict[str, Any]:
+    """
+    Parse a raw feed payload.
+    
+    Dicts (e.g. messages queued before the subscriber passed payloads
+    through) are returned as-is.
+    """
+    if isinstance(payload, (str, bytes)):
+        return orjson.loads(payload)
+    return payload
+
+
 class EnrichmentTask(Task):
     """
     Base task class with error handling and logging.
@@ -108,11 +192,11 @@ class EnrichmentTask(Task):
             'args': args,
             'timestamp': datetime.now().isoformat()
         }
-        redis_client.lpush('dlq:enrichment', json.dumps(dlq_message))
+        redis_client.lpush('dlq:enrichment', orjson.dumps(dlq_message))
 
 
 @celery_app.task(base=EnrichmentTask, bind=True)
-def process_underlying_tick(self, tick_data: Dict[str, Any]):
+def process_underlying_tick(self, tick_data: FeedPayload):
     """
     Process underlying price tick.
     
@@ -122,44 +206,37 @@ def process_underlying_tick(self, tick_data: Dict[str, Any]):
     - Publish enriched tick to WebSocket channel
     
     Args:
-        tick_data: Underlying tick dictionary
+        tick_data: Underlying tick dictionary (or its raw JSON from the feed)
     """
     try:
+        tick_data = load_payload(tick_data)
         product = tick_data['product']
         price = tick_data['price']
         timestamp = datetime.fromisoformat(tick_data['timestamp'])
         tick_id = tick_data.get('tick_id', 0)
+        processed_at = datetime.now()  # One clock read, stored and published
         
-        # Idempotency check
-        redis_client = get_redis_client()
-        idempotency_key = f"processed:underlying:{product}:{tick_id}"
-        if redis_client.exists(idempotency_key):
-            logger.info("tick_already_processed", product=product, tick_id=tick_id)
-            return
-        
-        # Store in MongoDB
+        # Store in MongoDB - the unique (product, tick_id, timestamp) index
+        # makes this the idempotency check
         db = get_mongo_client()['deltastream']
-        db.underlying_ticks.insert_one({
-            'product': product,
-            'price': price,
-            'timestamp': timestamp,
-            'tick_id': tick_id,
-            'processed_at': datetime.now()
-        })
-        
-        # Update Redis cache (latest price)
-        redis_client.setex(
-            f"latest:underlying:{product}",
-            300,  # 5 minute TTL
-            json.dumps({'price': price, 'timestamp': tick_data['timestamp']})
-        )
+        try:
+            db.underlying_ticks.insert_one({
+                'product': product,
+                'price': price,
+                'timestamp': timestamp,
+                'tick_id': tick_id,
+                'processed_at': processed_at
+            })
+        except DuplicateKeyError:
+            # A retry/redelivery of this task may have stored the tick and then
+            # failed before the steps below, which are idempotent - redo them
+            redelivered = (self.request.delivery_info or {}).get('redelivered')
+            if not (redelivered or self.request.retries):
+                logger.info("tick_already_processed", product=product, tick_id=tick_id)
+                return
         
         # Calculate OHLC windows (1min, 5min, 15min)
-        for window_minutes in [1, 5, 15]:
-            calculate_ohlc_window.delay(product, window_minutes)
-        
-        # Mark as processed (TTL 1 hour)
-        redis_client.setex(idempotency_key, 3600, '1')
+        calculate_ohlc_windows.delay(product)
         
         # Publish enriched tick
         enriched = {
@@ -167,9 +244,19 @@ def process_underlying_tick(self, tick_data: Dict[str, Any]):
             'product': product,
             'price': price,
             'timestamp': tick_data['timestamp'],
-            'processed_at': datetime.now().isoformat()
+            'processed_at': processed_at  # orjson writes the ISO string
         }
-        redis_client.publish('enriched:underlying', json.dumps(enriched))
+        
+        # Cache latest price and publish in one round-trip
+        redis_client = get_redis_client()
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(
+            f"latest:underlying:{product}",
+            300,  # 5 minute TTL
+            orjson.dumps({'price': price, 'timestamp': tick_data['timestamp']})
+        )
+        pipe.publish('enriched:underlying', orjson.dumps(enriched))
+        pipe.execute()
         
         logger.info(
             "processed_underlying_tick",
@@ -184,7 +271,7 @@ def process_underlying_tick(self, tick_data: Dict[str, Any]):
 
 
 @celery_app.task(base=EnrichmentTask, bind=True)
-def process_option_quote(self, quote_data: Dict[str, Any]):
+def process_option_quote(self, quote_data: FeedPayload):
     """
     Process individual option quote.
     
@@ -193,9 +280,10 @@ def process_option_quote(self, quote_data: Dict[str, Any]):
     - Calculate implied volatility surface point
     
     Args:
-        quote_data: Option quote dictionary
+        quote_data: Option quote dictionary (or its raw JSON from the feed)
     """
     try:
+        quote_data = load_payload(quote_data)
         symbol = quote_data['symbol']
         product = quote_data['product']
         
@@ -207,20 +295,21 @@ def process_option_quote(self, quote_data: Dict[str, Any]):
             'processed_at': datetime.now()
         })
         
-        # Update Redis cache (latest quote)
+        # Update Redis cache (latest quote) and store for IV surface
+        # calculation in one round-trip
         redis_client = get_redis_client()
-        redis_client.setex(
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(
             f"latest:option:{symbol}",
             300,
-            json.dumps(quote_data)
+            orjson.dumps(quote_data)
         )
-        
-        # Store for IV surface calculation
-        redis_client.zadd(
+        pipe.zadd(
             f"iv_surface:{product}",
-            {json.dumps({'strike': quote_data['strike'], 'iv': quote_data['iv'], 
-                        'expiry': quote_data['expiry']}): quote_data['strike']}
+            {orjson.dumps({'strike': quote_data['strike'], 'iv': quote_data['iv'], 
+                           'expiry': quote_data['expiry']}): quote_data['strike']}
         )
+        pipe.execute()
         
         logger.info(
             "processed_option_quote",
@@ -235,7 +324,7 @@ def process_option_quote(self, quote_data: Dict[str, Any]):
 
 
 @celery_app.task(base=EnrichmentTask, bind=True)
-def process_option_chain(self, chain_data: Dict[str, Any]):
+def process_option_chain(self, chain_data: FeedPayload):
     """
     Process complete option chain.
     
@@ -245,44 +334,52 @@ def process_option_chain(self, chain_data: Dict[str, Any]):
     - Identify ATM straddle
     - Calculate total call/put open interest build-up
     - Publish enriched chain
+    - Trigger volatility surface calculation
     
     Args:
-        chain_data: Option chain dictionary
+        chain_data: Option chain dictionary (or its raw JSON from the feed)
     """
     try:
+        chain_data = load_payload(chain_data)
         product = chain_data['product']
         expiry = chain_data['expiry']
         spot_price = chain_data['spot_price']
         calls = chain_data['calls']
         puts = chain_data['puts']
         
+        # Find ATM strike
+        strikes = sorted(chain_data['strikes'])
+        atm_strike = find_atm_strike(strikes, spot_price)
+        
+        # Columnar view of each side - one pass over the dicts, then
+        # totals, OTM build-up (OI changes - simplified for demo), ATM legs
+        # and max pain are all vectorized
+        call_strikes, call_oi, call_volume = chain_side_arrays(calls)
+        put_strikes, put_oi, put_volume = chain_side_arrays(puts)
+        
         # Calculate PCR (Put-Call Ratio)
-        total_call_oi = sum(c['open_interest'] for c in calls)
-        total_put_oi = sum(p['open_interest'] for p in puts)
+        total_call_oi = int(call_oi.sum())
+        total_put_oi = int(put_oi.sum())
         pcr = total_put_oi / total_call_oi if total_call_oi > 0 else 0
         
-        total_call_volume = sum(c['volume'] for c in calls)
-        total_put_volume = sum(p['volume'] for p in puts)
+        total_call_volume = int(call_volume.sum())
+        total_put_volume = int(put_volume.sum())
         pcr_volume = total_put_volume / total_call_volume if total_call_volume > 0 else 0
         
-        # Find ATM strike
-        strikes = sorted(chain_data['strikes'])
-        atm_strike = min(strikes, key=lambda x: abs(x - spot_price))
-        
-        # Get ATM straddle
-        atm_call = next((c for c in calls if c['strike'] == atm_strike), None)
-        atm_put = next((p for p in puts if p['strike'] == atm_strike), None)
+        # Get ATM straddle (first listed option at the ATM strike)
+        atm_calls = np.flatnonzero(call_strikes == atm_strike)
+        atm_puts = np.flatnonzero(put_strikes == atm_strike)
         
         atm_straddle_price = 0
-        if atm_call and atm_put:
-            atm_straddle_price = atm_call['last'] + atm_put['last']
+        if atm_calls.size and atm_puts.size:
+            atm_straddle_price = calls[atm_calls[0]]['last'] + puts[atm_puts[0]]['last']
         
         # Calculate max pain (strike with maximum total writer profit)
-        max_pain_strike = calculate_max_pain(calls, puts, strikes)
+        max_pain_strike = strikes[max_pain_index(strikes, call_strikes, call_oi, put_strikes, put_oi)]
         
-        # Build-up analysis (OI changes - simplified for demo)
-        call_buildup = sum(c['open_interest'] for c in calls if c['strike'] > spot_price)
-        put_buildup = sum(p['open_interest'] for p in puts if p['strike'] < spot_price)
+        # Build-up analysis
+        call_buildup = int(call_oi[call_strikes > spot_price].sum())
+        put_buildup = int(put_oi[put_strikes < spot_price].sum())
         
         # Create enriched chain
         enriched_chain = {
@@ -311,19 +408,21 @@ def process_option_chain(self, chain_data: Dict[str, Any]):
             'timestamp': datetime.fromisoformat(chain_data['timestamp'])
         })
         
-        # Update Redis cache
+        # Update Redis cache, PCR and publish in one round-trip
         redis_client = get_redis_client()
-        redis_client.setex(
+        chain_json = orjson.dumps(enriched_chain)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(
             f"latest:chain:{product}:{expiry}",
             300,
-            json.dumps(enriched_chain)
+            chain_json
         )
         
         # Cache PCR for analytics
-        redis_client.setex(
+        pipe.setex(
             f"latest:pcr:{product}:{expiry}",
             300,
-            json.dumps({
+            orjson.dumps({
                 'pcr_oi': round(pcr, 4),
                 'pcr_volume': round(pcr_volume, 4),
                 'timestamp': chain_data['timestamp']
@@ -331,7 +430,11 @@ def process_option_chain(self, chain_data: Dict[str, Any]):
         )
         
         # Publish enriched chain
-        redis_client.publish('enriched:option_chain', json.dumps(enriched_chain))
+        pipe.publish('enriched:option_chain', chain_json)
+        pipe.execute()
+        
+        # Also trigger volatility surface calculation
+        calculate_volatility_surface.delay(product)
         
         logger.info(
             "processed_option_chain",
@@ -347,6 +450,42 @@ def process_option_chain(self, chain_data: Dict[str, Any]):
         raise
 
 
+def find_atm_strike(strikes: List[float], spot_price: float) -> float:
+    """
+    Find the strike closest to spot (lower strike wins a tie).
+    
+    Args:
+        strikes: Strike prices, sorted ascending
+        spot_price: Current underlying price
+    
+    Returns:
+        ATM strike price
+    """
+    # Only the neighbours of spot's insertion point can be closest
+    i = bisect.bisect_left(strikes, spot_price)
+    return min(strikes[max(0, i - 1):i + 1], key=lambda x: abs(x - spot_price))
+
+
+def chain_side_arrays(options: List[Dict]) -> np.ndarray:
+    """
+    Convert one side (calls or puts) of an option chain to columns.
+    
+    One pass over the dicts; everything downstream is vectorized.
+    
+    Args:
+        options: List of call or put options
+    
+    Returns:
+        (3, N) float64 array of strike, open_interest and volume rows
+    """
+    rows = np.fromiter(
+        ((o['strike'], o['open_interest'], o['volume']) for o in options),
+        dtype=np.dtype((np.float64, 3)),
+        count=len(options)
+    )
+    return rows.T
+
+
 def calculate_max_pain(calls: List[Dict], puts: List[Dict], strikes: List[float]) -> float:
     """
     Calculate max pain strike (strike where option writers have maximum profit).
@@ -362,84 +501,143 @@ def calculate_max_pain(calls: List[Dict], puts: List[Dict], strikes: List[float]
     Returns:
         Max pain strike price
     """
-    max_pain = strikes[0]
-    min_total_value = float('inf')
-    
-    for strike in strikes:
-        # Calculate total value for this strike
-        call_value = sum(
-            c['open_interest'] * max(0, strike - c['strike'])
-            for c in calls
-        )
-        put_value = sum(
-            p['open_interest'] * max(0, p['strike'] - strike)
-            for p in puts
-        )
-        total_value = call_value + put_value
-        
-        if total_value < min_total_value:
-            min_total_value = total_value
-            max_pain = strike
+    call_strikes = np.fromiter((c['strike'] for c in calls), dtype=np.float64, count=len(calls))
+    call_oi = np.fromiter((c['open_interest'] for c in calls), dtype=np.float64, count=len(calls))
+    put_strikes = np.fromiter((p['strike'] for p in puts), dtype=np.float64, count=len(puts))
+    put_oi = np.fromiter((p['open_interest'] for p in puts), dtype=np.float64, count=len(puts))
     
-    return max_pain
+    return strikes[max_pain_index(strikes, call_strikes, call_oi, put_strikes, put_oi)]
+
+
+def max_pain_index(strikes: List[float], call_strikes: np.ndarray, call_oi: np.ndarray,
+                   put_strikes: np.ndarray, put_oi: np.ndarray) -> int:
+    """Index into `strikes` of the max pain strike, from columnar chain data"""
+    strikes_arr = np.asarray(strikes, dtype=np.float64)
+    
+    # Sum of oi * max(0, K - strike) over calls and oi * max(0, strike - K)
+    # over puts, for every candidate strike K, via prefix sums:
+    # O((S + N) log N) instead of an S x N payoff matrix
+    call_value = _intrinsic_value_totals(strikes_arr, call_strikes, call_oi, puts=False)
+    put_value = _intrinsic_value_totals(strikes_arr, put_strikes, put_oi, puts=True)
+    total_value = call_value + put_value
+    
+    # argmin returns the first minimum, matching the strict '<' scan it replaces
+    return int(total_value.argmin())
+
+
+def _intrinsic_value_totals(strikes_arr: np.ndarray, opt_strikes: np.ndarray, opt_oi: np.ndarray,
+                            puts: bool) -> np.ndarray:
+    """Total intrinsic value (oi-weighted) of options at each strike in `strikes_arr`"""
+    order = np.argsort(opt_strikes, kind='stable')
+    opt_strikes = opt_strikes[order]
+    opt_oi = opt_oi[order]
+    
+    # cum_oi[n] / cum_notional[n]: sums over the n lowest option strikes
+    cum_oi = np.concatenate(([0.0], np.cumsum(opt_oi)))
+    cum_notional = np.concatenate(([0.0], np.cumsum(opt_oi * opt_strikes)))
+    
+    if puts:
+        # In the money when option strike > K
+        n = np.searchsorted(opt_strikes, strikes_arr, side='right')
+        return (cum_notional[-1] - cum_notional[n]) - strikes_arr * (cum_oi[-1] - cum_oi[n])
+    
+    # Calls are in the money when option strike < K
+    n = np.searchsorted(opt_strikes, strikes_arr, side='left')
+    return strikes_arr * cum_oi[n] - cum_notional[n]
 
 
 @celery_app.task(base=EnrichmentTask, bind=True)
-def calculate_ohlc_window(self, product: str, window_minutes: int):
+def calculate_ohlc_windows(self, product: str, windows: List[int] = OHLC_WINDOWS):
     """
-    Calculate OHLC (Open, High, Low, Close) for a time window.
+    Calculate OHLC (Open, High, Low, Close) for several time windows.
+    
+    The windows overlap, so one index scan over the widest window feeds
+    all of them ($facet) instead of one query (and task) per window.
     
     Args:
         product: Product symbol
-        window_minutes: Time window in minutes
+        windows: Time windows in minutes
     """
     try:
         db = get_mongo_client()['deltastream']
         redis_client = get_redis_client()
         
-        # Get ticks from last N minutes
-        start_time = datetime.now() - timedelta(minutes=window_minutes)
-        ticks = list(db.underlying_ticks.find({
-            'product': product,
-            'timestamp': {'$gte': start_time}
-        }).sort('timestamp', ASCENDING))
-        
-        if not ticks:
-            return
-        
-        # Calculate OHLC
-        prices = [t['price'] for t in ticks]
-        ohlc = {
-            'product': product,
-            'window_minutes': window_minutes,
-            'open': prices[0],
-            'high': max(prices),
-            'low': min(prices),
-            'close': prices[-1],
-            'start_time': ticks[0]['timestamp'].isoformat(),
-            'end_time': ticks[-1]['timestamp'].isoformat(),
-            'num_ticks': len(ticks)
+        # Reduce ticks from the last N minutes to one OHLC document per
+        # window, server-side
+        now = datetime.now()
+        facets = {
+            str(window_minutes): [
+                {'$match': {'timestamp': {'$gte': now - timedelta(minutes=window_minutes)}}},
+                {'$group': {
+                    '_id': None,
+                    'open': {'$first': '$price'},
+                    'high': {'$max': '$price'},
+                    'low': {'$min': '$price'},
+                    'close': {'$last': '$price'},
+                    'start_time': {'$first': '$timestamp'},
+                    'end_time': {'$last': '$timestamp'},
+                    'num_ticks': {'$sum': 1}
+                }}
+            ]
+            for window_minutes in windows
         }
+        results = next(db.underlying_ticks.aggregate([
+            {'$match': {
+                'product': product,
+                'timestamp': {'$gte': now - timedelta(minutes=max(windows))}
+            }},
+            {'$sort': {'timestamp': ASCENDING}},
+            {'$facet': facets}
+        ]))
+        
+        pipe = redis_client.pipeline(transaction=False)
+        
+        for window_minutes in windows:
+            window_result = results[str(window_minutes)]
+            if not window_result:
+                continue
+            result = window_result[0]
+            
+            # Build OHLC payload
+            ohlc = {
+                'product': product,
+                'window_minutes': window_minutes,
+                'open': result['open'],
+                'high': result['high'],
+                'low': result['low'],
+                'close': result['close'],
+                'start_time': result['start_time'].isoformat(),
+                'end_time': result['end_time'].isoformat(),
+                'num_ticks': result['num_ticks']
+            }
+            
+            # Cache in Redis
+            pipe.setex(
+                f"ohlc:{product}:{window_minutes}m",
+                window_minutes * 60,
+                orjson.dumps(ohlc)
+            )
+            
+            logger.info(
+                "calculated_ohlc",
+                product=product,
+                window=f"{window_minutes}m",
+                ohlc=ohlc
+            )
         
-        # Cache in Redis
-        redis_client.setex(
-            f"ohlc:{product}:{window_minutes}m",
-            window_minutes * 60,
-            json.dumps(ohlc)
-        )
-        
-        logger.info(
-            "calculated_ohlc",
-            product=product,
-            window=f"{window_minutes}m",
-            ohlc=ohlc
-        )
+        pipe.execute()
         
     except Exception as e:
         logger.error("ohlc_calculation_error", error=str(e), exc_info=True)
         raise
 
 
+@celery_app.task(base=EnrichmentTask, bind=True)
+def calculate_ohlc_window(self, product: str, window_minutes: int):
+    """Single-window OHLC; kept for messages queued before calculate_ohlc_windows."""
+    calculate_ohlc_windows(product, [window_minutes])
+
+
 @celery_app.task(base=EnrichmentTask, bind=True)
 def calculate_volatility_surface(self, product: str):
     """
@@ -497,7 +695,7 @@ def calculate_volatility_surface(self, product: str):
         redis_client.setex(
             f"volatility_surface:{product}",
             300,
-            json.dumps(surface)
+            orjson.dumps(surface)
         )
         
         logger.info(
@@ -511,38 +709,71 @@ def calculate_volatility_surface(self, product: str):
         raise
 
 
+def dispatch_feed_messages(messages: List[Dict]):
+    """
+    Dispatch a batch of pub/sub messages to their Celery tasks.
+    
+    All sends share one producer (and broker connection) instead of
+    acquiring one from the pool per message. Routing only needs the
+    channel, so payloads are passed through unparsed - each task parses
+    its own.
+    
+    Args:
+        messages: Pub/sub messages, in arrival order
+    """
+    with celery_app.producer_or_acquire() as producer:
+        for message in messages:
+            channel = message['channel']
+            data = message['data']
+            
+            # Dispatch to appropriate task
+            if channel == 'market:underlying':
+                process_underlying_tick.apply_async((data,), producer=producer)
+            elif channel == 'market:option_quote':
+                process_option_quote.apply_async((data,), producer=producer)
+            elif channel == 'market:option_chain':
+                # Full calls/puts arrays - tens of KB, compress on the wire
+                process_option_chain.apply_async((data,), producer=producer, compression='zstd')
+
+
 def subscribe_to_feeds():
     """
     Subscribe to Redis pub/sub channels and dispatch tasks.
     
     This runs in the main process and listens to market data feeds,
-    dispatching Celery tasks for processing.
+    dispatching Celery tasks for processing. Messages are dispatched in
+    batches of up to DISPATCH_BATCH_SIZE, or every DISPATCH_INTERVAL
+    seconds, whichever comes first.
     """
     redis_client = get_redis_client()
-    pubsub = redis_client.pubsub()
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
     
     # Subscribe to channels
     pubsub.subscribe('market:underlying', 'market:option_quote', 'market:option_chain')
     
     logger.info("subscribed_to_feeds", channels=['market:underlying', 'market:option_quote', 'market:option_chain'])
     
+    batch = []
+    batch_started = 0.0
+    
     try:
-        for message in pubsub.listen():
-            if message['type'] == 'message':
-                channel = message['channel']
-                data = json.loads(message['data'])
-                
-                # Dispatch to appropriate task
-                if channel == 'market:underlying':
-                    process_underlying_tick.delay(data)
-                elif channel == 'market:option_quote':
-                    process_option_quote.delay(data)
-                elif channel == 'market:option_chain':
-                    process_option_chain.delay(data)
-                    # Also trigger volatility surface calculation
-                    calculate_volatility_surface.delay(data['product'])
+        while True:
+            message = pubsub.get_message(timeout=DISPATCH_INTERVAL)
+            if message and message['type'] == 'message':
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(message)
+                if len(batch) < DISPATCH_BATCH_SIZE and time.monotonic() - batch_started < DISPATCH_INTERVAL:
+                    continue
+            
+            # Batch full, old enough, or the feed went quiet
+            if batch:
+                dispatch_feed_messages(batch)
+                batch = []
                     
     except KeyboardInterrupt:
+        if batch:
+            dispatch_feed_messages(batch)
         logger.info("subscriber_stopped")
     except Exception as e:
         logger.error("subscriber_error", error=str(e), exc_info=True)
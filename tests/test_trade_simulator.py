@@ -0,0 +1,132 @@
+"""Tests for Trade Simulator service."""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../services/trade-simulator')))
+
+
+def test_performance_pairs_buys_fifo():
+    """Test each sell is paired with the oldest open buy of its symbol."""
+    from portfolio import _paired_trade_pnls
+
+    # Newest first, as returned by get_trade_history
+    trades = [
+        {'symbol': 'A', 'side': 'SELL', 'value': 120.0, 'commission': 1.0},
+        {'symbol': 'A', 'side': 'SELL', 'value': 90.0, 'commission': 1.0},
+        {'symbol': 'A', 'side': 'BUY', 'value': 110.0, 'commission': 1.0},
+        {'symbol': 'A', 'side': 'BUY', 'value': 100.0, 'commission': 1.0},
+        {'symbol': 'B', 'side': 'SELL', 'value': 50.0, 'commission': 1.0},
+    ]
+
+    pnls = _paired_trade_pnls(trades)
+
+    # Oldest buy (100) closes against the first sell (90), then 110 vs 120
+    assert pnls.tolist() == [-12.0, 8.0]
+
+
+def _fill(quantity, value, commission):
+    """Build a trade fill as read by the realized P&L matcher."""
+    return {'quantity': quantity, 'value': value, 'commission': commission}
+
+
+def test_realized_pnl_sell_spans_buy_lots():
+    """Test one sell is matched FIFO against several buy lots at different prices."""
+    from portfolio import _fifo_realized_pnl
+
+    buys = [_fill(10, 1000.0, 2.0), _fill(5, 550.0, 1.0), _fill(10, 1200.0, 3.0)]
+    sells = [_fill(20, 2600.0, 4.0)]
+
+    # 10 @ 100 -> 300 - 6, 5 @ 110 -> 100 - 5, 5 of 10 @ 120 -> 50 - 7
+    assert _fifo_realized_pnl(buys, sells) == 432.0
+
+
+def test_realized_pnl_ignores_sells_beyond_open_buys():
+    """Test sell quantity beyond the open buys is left unmatched."""
+    from portfolio import _fifo_realized_pnl
+
+    buys = [_fill(10, 1000.0, 2.0)]
+    sells = [_fill(15, 1650.0, 3.0), _fill(5, 600.0, 1.0)]
+
+    # Only 10 @ 100 vs 110 is matched; the extra 5 and the second sell are not
+    assert _fifo_realized_pnl(buys, sells) == 95.0
+
+
+def test_realized_pnl_buy_after_flat():
+    """Test a buy placed after the position went flat is matched by the next sell."""
+    from portfolio import _fifo_realized_pnl
+
+    buys = [_fill(10, 1000.0, 2.0), _fill(10, 1200.0, 2.0)]
+    sells = [_fill(10, 1100.0, 2.0), _fill(4, 500.0, 1.0)]
+
+    # First sell closes 10 @ 100 -> 100 - 4; second takes 4 @ 120 -> 20 - 3
+    assert _fifo_realized_pnl(buys, sells) == 113.0
+
+
+def _make_book(bids, asks):
+    """Build an order book with fixed (price, qty) depth, best level first."""
+    import numpy as np
+    from order_book import OrderBook
+
+    book = OrderBook('TEST', 100.0)
+    book.bid_prices = np.array([p for p, _ in bids], dtype=np.float64)
+    book.bid_qtys = np.array([q for _, q in bids], dtype=np.int32)
+    book.bid_ts = book.bid_ts[:len(bids)]
+    book.ask_prices = np.array([p for p, _ in asks], dtype=np.float64)
+    book.ask_qtys = np.array([q for _, q in asks], dtype=np.int32)
+    book.ask_ts = book.ask_ts[:len(asks)]
+    return book
+
+
+def test_market_buy_partial_fill_within_level():
+    """Test a market buy smaller than the best ask leaves the rest of that level."""
+    book = _make_book(bids=[(99.0, 10)], asks=[(101.0, 10), (102.0, 20), (103.0, 30)])
+
+    fills = book.match_market_buy(4)
+
+    assert fills == [(101.0, 4)]
+    assert book.ask_prices.tolist() == [101.0, 102.0, 103.0]
+    assert book.ask_qtys.tolist() == [6, 20, 30]
+    assert book.last_trade_price == 101.0
+
+
+def test_market_sell_exhausts_levels_exactly():
+    """Test a market sell that exactly consumes two bid levels removes both."""
+    book = _make_book(bids=[(99.0, 10), (98.0, 20), (97.0, 30)], asks=[(101.0, 10)])
+
+    fills = book.match_market_sell(30)
+
+    assert fills == [(99.0, 10), (98.0, 20)]
+    assert book.bid_prices.tolist() == [97.0]
+    assert book.bid_qtys.tolist() == [30]
+    assert len(book.bid_ts) == 1
+    assert book.last_trade_price == 98.0
+
+
+def test_limit_orders_stop_at_limit_price():
+    """Test limit orders only walk levels at or better than their price."""
+    book = _make_book(bids=[(99.0, 10), (98.0, 20), (97.0, 30)],
+                      asks=[(101.0, 10), (102.0, 20), (103.0, 30)])
+
+    assert book.check_limit_buy(102.0, 100) == [(101.0, 10), (102.0, 20)]
+    assert book.check_limit_buy(102.0, 15) == [(101.0, 10), (102.0, 5)]
+    assert book.check_limit_buy(100.0, 5) is None
+    assert book.check_limit_sell(98.0, 100) == [(99.0, 10), (98.0, 20)]
+    assert book.check_limit_sell(99.5, 5) is None
+
+    # Limit checks do not consume depth
+    assert book.ask_qtys.tolist() == [10, 20, 30]
+    assert book.bid_qtys.tolist() == [10, 20, 30]
+
+
+def test_market_buy_larger_than_book():
+    """Test a market buy larger than total depth fills what exists and empties the side."""
+    book = _make_book(bids=[(99.0, 10)], asks=[(101.0, 10), (102.0, 20)])
+
+    fills = book.match_market_buy(100)
+
+    assert fills == [(101.0, 10), (102.0, 20)]
+    assert book.ask_prices.size == 0
+    assert book.ask_qtys.size == 0
+    assert book.get_best_ask() is None
+    assert book.match_market_buy(5) == []
+    assert book.last_trade_price == 102.0
@@ -31,6 +31,42 @@ def test_max_pain_calculation():
     assert isinstance(max_pain, (int, float))
 
 
+def test_max_pain_exact_strike():
+    """Test max pain picks the strike with the lowest total intrinsic value."""
+    from app import calculate_max_pain
+    
+    calls = [
+        {'strike': 120, 'open_interest': 1000},
+        {'strike': 100, 'open_interest': 500},
+        {'strike': 130, 'open_interest': 200},
+        {'strike': 110, 'open_interest': 3000},
+    ]
+    
+    puts = [
+        {'strike': 100, 'open_interest': 2500},
+        {'strike': 110, 'open_interest': 400},
+        {'strike': 120, 'open_interest': 1500},
+        {'strike': 130, 'open_interest': 300},
+    ]
+    
+    strikes = [100, 110, 120, 130]
+    
+    # Call + put value at each strike, worked by hand:
+    # 100: 0 + 43000, 110: 5000 + 21000, 120: 40000 + 3000, 130: 85000 + 0
+    assert calculate_max_pain(calls, puts, strikes) == 110
+    
+    # Brute force over every candidate, including ones without listed options
+    strikes = [95, 100, 105, 110, 115, 120, 125, 130, 135]
+    
+    def total_value(k):
+        return (sum(c['open_interest'] * max(0, k - c['strike']) for c in calls)
+                + sum(p['open_interest'] * max(0, p['strike'] - k) for p in puts))
+    
+    expected = min(strikes, key=total_value)
+    
+    assert calculate_max_pain(calls, puts, strikes) == expected == 110
+
+
 def test_pcr_calculation():
     """Test PCR calculation logic."""
     # Simulate option chain data
@@ -61,3 +97,15 @@ def test_pcr_calculation():
     assert isinstance(pcr, float)
     # In this test data, puts > calls, so PCR > 1
     assert pcr > 1.0
+
+
+def test_atm_strike_selection():
+    """Test ATM strike is the one nearest spot, lower strike on a tie."""
+    from app import find_atm_strike
+    
+    strikes = [21400, 21450, 21500, 21550, 21600]
+    
+    assert find_atm_strike(strikes, 21512.5) == 21500
+    assert find_atm_strike(strikes, 21475) == 21450
+    assert find_atm_strike(strikes, 21000) == 21400
+    assert find_atm_strike(strikes, 22000) == 21600